@@ -32,3 +32,28 @@ def has_event(api_url: str) -> bool:
 
     logger.critical("Erro ao acessar a API: %s", response.status_code)
     return False
+
+
+class ApiCalendarSource:
+    """
+    Fonte de agenda baseada na API do Apps Script.
+
+    Encapsula a URL da API para que o controlador trate todas as fontes de agenda
+    da mesma forma, através do método `has_event`.
+    """
+
+    def __init__(self, api_url: str):
+        """
+        Inicializa a fonte de agenda.
+
+        :param api_url: URL da API que retorna informações sobre eventos.
+        """
+        self.api_url = api_url
+
+    def has_event(self) -> bool:
+        """
+        Verifica se há um evento ocorrendo no momento.
+
+        :return: True se houver um evento no momento, False caso contrário.
+        """
+        return has_event(self.api_url)
@@ -0,0 +1,503 @@
+"""
+Módulo para leitura de agendas no formato iCalendar (ICS).
+
+Este módulo contém uma fonte de agenda que lê o feed ICS de uma agenda, a partir de uma URL
+(ex.: o endereço secreto no formato iCal do Google Agenda) ou de um arquivo local, sem
+passar pela API do Apps Script.
+
+O feed é lido no máximo a cada `refresh_interval` segundos. Requisições HTTP usam os
+cabeçalhos ETag/Last-Modified e o conteúdo recebido é comparado pelo hash; arquivos locais
+são comparados pela data de modificação e tamanho. Quando o feed não mudou, ele não é
+processado novamente. As recorrências (RRULE) são expandidas em uma lista ordenada de
+intervalos para uma janela móvel, de modo que a consulta `has_event` é feita apenas em
+memória.
+
+Exemplo de uso:
+
+calendar = IcalCalendarSource('https://calendar.google.com/calendar/ical/.../basic.ics')
+if calendar.has_event():
+    print('Há evento agora')
+"""
+
+import hashlib
+import os
+import re
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+import requests
+from dateutil import rrule, tz
+from logger import logger
+
+# Intervalo padrão, em segundos, entre as leituras do feed
+DEFAULT_REFRESH_INTERVAL = 300
+# Intervalo, em segundos, entre as tentativas de leitura enquanto o feed não for carregado
+DEFAULT_RETRY_INTERVAL = 30
+# Tamanho padrão, em dias, da janela de expansão das recorrências
+DEFAULT_WINDOW_DAYS = 7
+# Falhas esperadas na leitura do feed: rede, arquivo e conteúdo inválido
+FETCH_ERRORS = (requests.RequestException, OSError, ValueError)
+# Margem anterior ao instante atual incluída na janela de expansão
+WINDOW_PAST_MARGIN = 86400
+
+DURATION_PATTERN = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+
+def iter_unfolded_lines(lines):
+    """
+    Junta as linhas dobradas do formato iCalendar (continuações iniciadas por espaço ou tab).
+
+    :param lines: Iterável de linhas do feed, sem as quebras de linha.
+    :return: Gerador de linhas lógicas completas.
+    """
+    current = None
+    for line in lines:
+        if line[:1] in (" ", "\t"):
+            if current is not None:
+                current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_content_line(line):
+    """
+    Separa uma linha de conteúdo em nome, parâmetros e valor.
+
+    Exemplo: 'DTSTART;TZID=America/Sao_Paulo:20250101T080000' resulta em
+    ('DTSTART', {'TZID': 'America/Sao_Paulo'}, '20250101T080000').
+
+    :param line: Linha lógica do feed.
+    :return: Tupla (nome, parâmetros, valor).
+    """
+    in_quotes = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            head, value = line[:index], line[index + 1:]
+            break
+    else:
+        head, value = line, ""
+
+    name, *raw_params = head.split(";")
+    params = {}
+    for raw_param in raw_params:
+        key, _, param_value = raw_param.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def iter_events(lines):
+    """
+    Lê o feed de forma incremental, produzindo cada VEVENT assim que ele termina.
+
+    Componentes aninhados (ex.: VALARM) e demais componentes (ex.: VTIMEZONE) são ignorados.
+
+    :param lines: Iterável de linhas do feed.
+    :return: Gerador de dicionários {nome da propriedade: [(parâmetros, valor), ...]}.
+    """
+    event = None
+    depth = 0
+    for line in iter_unfolded_lines(lines):
+        name, params, value = parse_content_line(line)
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and event is None:
+                event = {}
+            elif event is not None:
+                depth += 1
+        elif name == "END":
+            if event is not None and depth:
+                depth -= 1
+            elif event is not None and value.upper() == "VEVENT":
+                yield event
+                event = None
+        elif event is not None and not depth:
+            event.setdefault(name, []).append((params, value))
+
+
+def parse_datetime(value, params):
+    """
+    Converte um valor DATE ou DATE-TIME do iCalendar.
+
+    Datas sem hora (eventos de dia inteiro) e horários sem fuso ("flutuantes") são
+    interpretados no horário local.
+
+    :param value: Valor da propriedade (ex.: '20250101T080000Z' ou '20250101').
+    :param params: Parâmetros da propriedade (ex.: {'TZID': 'America/Sao_Paulo'}).
+    :return: Tupla (data/hora sem fuso no relógio local do evento, fuso ou None para
+    horário local, True se for uma data sem hora).
+    """
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value[:8], "%Y%m%d"), None, True
+    if value.endswith("Z"):
+        return datetime.strptime(value[:-1], "%Y%m%dT%H%M%S"), timezone.utc, False
+    event_tz = None
+    if "TZID" in params:
+        event_tz = tz.gettz(params["TZID"])
+        if event_tz is None:
+            logger.warning("Fuso horário desconhecido '%s', usando o horário local", params["TZID"])
+    return datetime.strptime(value, "%Y%m%dT%H%M%S"), event_tz, False
+
+
+def parse_duration(value):
+    """
+    Converte um valor DURATION do iCalendar (ex.: 'PT1H30M') em segundos.
+
+    :param value: Valor da propriedade.
+    :return: Duração em segundos.
+    :raises ValueError: Se o valor for inválido.
+    """
+    match = DURATION_PATTERN.match(value.strip())
+    if match is None:
+        raise ValueError(f"Duração inválida: {value}")
+    parts = {key: int(part or 0) for key, part in match.groupdict().items() if key != "sign"}
+    seconds = timedelta(**parts).total_seconds()
+    return -seconds if match.group("sign") == "-" else seconds
+
+
+def to_timestamp(wall_time, event_tz):
+    """
+    Converte uma data/hora no relógio do evento em timestamp Unix.
+
+    :param wall_time: Data/hora sem fuso.
+    :param event_tz: Fuso do evento ou None para horário local.
+    :return: Timestamp em segundos.
+    """
+    if event_tz is None:
+        return wall_time.timestamp()
+    return wall_time.replace(tzinfo=event_tz).timestamp()
+
+
+def to_wall_time(timestamp, event_tz):
+    """
+    Converte um timestamp Unix em data/hora sem fuso no relógio do evento.
+
+    :param timestamp: Timestamp em segundos.
+    :param event_tz: Fuso do evento ou None para horário local.
+    :return: Data/hora sem fuso.
+    """
+    return datetime.fromtimestamp(timestamp, event_tz).replace(tzinfo=None)
+
+
+class CalendarEvent:
+    """
+    Evento lido do feed, com a regra de recorrência ainda não expandida.
+    """
+
+    def __init__(self, properties):
+        """
+        Inicializa o evento a partir das propriedades de um VEVENT.
+
+        :param properties: Dicionário produzido por `iter_events`.
+        :raises ValueError: Se o evento não tiver DTSTART válido.
+        """
+        if "DTSTART" not in properties:
+            raise ValueError("Evento sem DTSTART")
+        params, value = properties["DTSTART"][0]
+        self.start, self.tz, is_date = parse_datetime(value, params)
+        self.uid = properties.get("UID", [({}, "")])[0][1]
+        self.cancelled = properties.get("STATUS", [({}, "")])[0][1].upper() == "CANCELLED"
+
+        start_ts = to_timestamp(self.start, self.tz)
+        if "DTEND" in properties:
+            end, end_tz, _ = parse_datetime(properties["DTEND"][0][1], properties["DTEND"][0][0])
+            self.duration = to_timestamp(end, end_tz) - start_ts
+        elif "DURATION" in properties:
+            self.duration = parse_duration(properties["DURATION"][0][1])
+        else:
+            self.duration = 86400 if is_date else 0
+
+        self.recurrence_id = None
+        if "RECURRENCE-ID" in properties:
+            params, value = properties["RECURRENCE-ID"][0]
+            self.recurrence_id = to_timestamp(*parse_datetime(value, params)[:2])
+
+        self.rules = [value for _, value in properties.get("RRULE", [])]
+        self.extra_starts = self._parse_date_list(properties.get("RDATE", []))
+        self.excluded_starts = set(self._parse_date_list(properties.get("EXDATE", [])))
+
+    @staticmethod
+    def _parse_date_list(entries):
+        """
+        Converte propriedades com listas de datas (EXDATE, RDATE) em timestamps.
+
+        Valores do tipo PERIOD são ignorados.
+
+        :param entries: Lista de (parâmetros, valor).
+        :return: Lista de timestamps.
+        """
+        timestamps = []
+        for params, value in entries:
+            if params.get("VALUE") == "PERIOD":
+                continue
+            for item in value.split(","):
+                if item:
+                    timestamps.append(to_timestamp(*parse_datetime(item, params)[:2]))
+        return timestamps
+
+    def _normalize_rule(self, rule):
+        """
+        Ajusta o UNTIL da regra para o relógio do evento, como exigido pelo dateutil para
+        datas de início sem fuso.
+
+        :param rule: Valor da propriedade RRULE.
+        :return: Regra ajustada.
+        """
+        parts = []
+        for part in rule.split(";"):
+            key, _, value = part.partition("=")
+            if key.upper() == "UNTIL" and value.endswith("Z"):
+                until = datetime.strptime(value[:-1], "%Y%m%dT%H%M%S")
+                until = to_wall_time(until.replace(tzinfo=timezone.utc).timestamp(), self.tz)
+                value = until.strftime("%Y%m%dT%H%M%S")
+            parts.append(f"{key}={value}")
+        return ";".join(parts)
+
+    def intervals(self, window_start, window_end, excluded=frozenset()):
+        """
+        Expande o evento em intervalos que se sobrepõem à janela informada.
+
+        :param window_start: Início da janela (timestamp).
+        :param window_end: Fim da janela (timestamp).
+        :param excluded: Inícios de ocorrências substituídas ou canceladas em outros VEVENTs.
+        :return: Lista de tuplas (início, fim) em timestamps.
+        """
+        if not self.rules and not self.extra_starts:
+            starts = [to_timestamp(self.start, self.tz)]
+        else:
+            rule_set = rrule.rruleset()
+            for rule in self.rules:
+                rule_set.rrule(rrule.rrulestr(self._normalize_rule(rule), dtstart=self.start))
+            rule_set.rdate(self.start)
+            after = to_wall_time(window_start - self.duration, self.tz) - timedelta(days=1)
+            before = to_wall_time(window_end, self.tz) + timedelta(days=1)
+            starts = [to_timestamp(occurrence, self.tz)
+                      for occurrence in rule_set.between(after, before, inc=True)]
+            starts.extend(self.extra_starts)
+
+        return [
+            (start, start + self.duration)
+            for start in starts
+            if start not in self.excluded_starts and start not in excluded
+            and start < window_end and start + self.duration > window_start
+        ]
+
+
+class IcalCalendarSource:
+    """
+    Fonte de agenda baseada em um feed iCalendar (URL ou arquivo local).
+
+    Mantém em memória os eventos lidos do feed e a lista ordenada de intervalos de ocorrência
+    dentro da janela móvel, respondendo `has_event` sem acessar a rede.
+    """
+
+    def __init__(self, location: str, refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+                 window_days: float = DEFAULT_WINDOW_DAYS,
+                 retry_interval: float = DEFAULT_RETRY_INTERVAL):
+        """
+        Inicializa a fonte de agenda.
+
+        :param location: URL do feed (http, https ou webcal) ou caminho de um arquivo .ics
+        (também aceito no formato file://).
+        :param refresh_interval: Intervalo mínimo, em segundos, entre leituras do feed.
+        :param window_days: Tamanho, em dias, da janela futura de expansão das recorrências.
+        :param retry_interval: Intervalo mínimo, em segundos, entre tentativas de leitura
+        enquanto o feed não tiver sido lido com sucesso.
+        """
+        url = urlsplit(location)
+        if url.scheme == "webcal":
+            location = "https" + location[len("webcal"):]
+        elif url.scheme == "file":
+            location = url.path
+        self.location = location
+        self.is_remote = url.scheme in ("http", "https", "webcal")
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.window = window_days * 86400
+
+        self._events = []
+        self._loaded = False
+        self._last_refresh = None
+        self._last_error = None
+        self._etag = None
+        self._last_modified = None
+        self._file_signature = None
+        self._content_hash = None
+
+        self._window_start = None
+        self._window_end = None
+        self._starts = []
+        self._max_ends = []
+
+    def has_event(self, now: float | None = None) -> bool:
+        """
+        Verifica se há um evento ocorrendo no instante informado.
+
+        Enquanto o feed não tiver sido lido com sucesso, a leitura é tentada no máximo a cada
+        `retry_interval` segundos e, entre as tentativas, o último erro é lançado novamente;
+        depois disso, ele é relido apenas se o intervalo de atualização tiver passado. Se a
+        leitura falhar e houver eventos em memória, eles continuam sendo utilizados.
+
+        :param now: Timestamp a ser verificado (padrão: instante atual).
+        :return: True se houver um evento no instante, False caso contrário.
+        :raises requests.RequestException: Se o feed remoto nunca tiver sido lido com sucesso.
+        :raises OSError: Se o arquivo do feed nunca tiver sido lido com sucesso.
+        :raises ValueError: Se o conteúdo do feed for inválido e nunca tiver sido lido.
+        """
+        if now is None:
+            now = time.time()
+
+        if not self._loaded:
+            if self._last_error is not None and now - self._last_refresh < self.retry_interval:
+                # O traceback anterior é descartado para não crescer a cada nova chamada
+                raise self._last_error.with_traceback(None)
+            self._last_refresh = now
+            try:
+                self.refresh()
+            except FETCH_ERRORS as e:
+                self._last_error = e
+                raise
+            self._last_error = None
+        elif now - self._last_refresh >= self.refresh_interval:
+            self._last_refresh = now
+            try:
+                self.refresh()
+            except FETCH_ERRORS as e:
+                logger.error("Erro ao ler a agenda %s, usando os dados em cache: %s",
+                             self.location, e)
+
+        if self._window_start is None or now < self._window_start \
+                or now > self._window_end - self.window / 2:
+            self._expand(now)
+
+        index = bisect_right(self._starts, now) - 1
+        return index >= 0 and self._max_ends[index] > now
+
+    def refresh(self):
+        """
+        Lê o feed e processa os eventos apenas se o conteúdo tiver mudado.
+
+        :return: True se os eventos foram atualizados, False se o feed não mudou.
+        """
+        content = self._fetch_remote() if self.is_remote else self._read_file()
+        if content is None:
+            return False
+
+        content_hash = hashlib.sha256(content).hexdigest()
+        if content_hash == self._content_hash:
+            return False
+
+        self._load(content.decode("utf-8").splitlines())
+        self._content_hash = content_hash
+        self._window_start = None
+        return True
+
+    def _fetch_remote(self):
+        """
+        Baixa o feed usando requisição condicional (ETag/Last-Modified).
+
+        :return: Conteúdo do feed ou None se o servidor indicar que ele não mudou.
+        :raises requests.RequestException: Se a requisição falhar ou o servidor responder
+        com um status diferente de 200 e 304.
+        """
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+
+        response = requests.get(self.location, headers=headers, timeout=10)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Erro ao acessar o feed: {response.status_code}", response=response
+            )
+
+        self._etag = response.headers.get("ETag")
+        self._last_modified = response.headers.get("Last-Modified")
+        return response.content
+
+    def _read_file(self):
+        """
+        Lê o arquivo do feed se a data de modificação ou o tamanho tiverem mudado.
+
+        :return: Conteúdo do arquivo ou None se ele não mudou.
+        :raises OSError: Se o arquivo não puder ser lido.
+        """
+        stat = os.stat(self.location)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._file_signature:
+            return None
+        with open(self.location, "rb") as feed_file:
+            content = feed_file.read()
+        self._file_signature = signature
+        return content
+
+    def _load(self, lines):
+        """
+        Processa as linhas do feed, substituindo os eventos em memória.
+
+        Eventos inválidos são registrados e ignorados.
+
+        :param lines: Iterável de linhas do feed.
+        """
+        events = []
+        for properties in iter_events(lines):
+            try:
+                events.append(CalendarEvent(properties))
+            except ValueError as e:
+                logger.warning("Evento ignorado na agenda %s: %s", self.location, e)
+        self._events = events
+        self._loaded = True
+        logger.info("Agenda %s carregada: %d eventos", self.location, len(events))
+
+    def _expand(self, now):
+        """
+        Expande os eventos na janela móvel que começa pouco antes de `now`.
+
+        Os intervalos são ordenados pelo início, e o maior fim acumulado permite verificar
+        com uma busca binária se algum intervalo contém um instante.
+
+        :param now: Timestamp de referência.
+        """
+        window_start = now - WINDOW_PAST_MARGIN
+        window_end = now + self.window
+
+        # Ocorrências substituídas (RECURRENCE-ID) não fazem parte da série original
+        overridden = {}
+        for event in self._events:
+            if event.recurrence_id is not None:
+                overridden.setdefault(event.uid, set()).add(event.recurrence_id)
+
+        intervals = []
+        for event in self._events:
+            if event.cancelled:
+                continue
+            excluded = overridden.get(event.uid, frozenset()) \
+                if event.recurrence_id is None else frozenset()
+            try:
+                intervals.extend(event.intervals(window_start, window_end, excluded))
+            except ValueError as e:
+                logger.warning("Recorrência ignorada no evento %s: %s", event.uid, e)
+        intervals.sort()
+
+        self._starts = [start for start, _ in intervals]
+        self._max_ends = []
+        max_end = float("-inf")
+        for _, end in intervals:
+            max_end = max(max_end, end)
+            self._max_ends.append(max_end)
+        self._window_start = window_start
+        self._window_end = window_end
@@ -0,0 +1,318 @@
+"""
+Carregamento da configuração dos dispositivos e relés.
+
+A configuração é lida de um arquivo JSON que descreve os dispositivos Modbus, os relés de
+cada dispositivo e a agenda associada a cada relé. As classes são imutáveis e comparáveis,
+o que permite calcular a diferença entre duas versões da configuração durante a recarga.
+
+Exemplo de arquivo:
+
+{
+  "cycle_interval": 30,
+  "devices": [
+    {
+      "name": "quadro-1",
+      "type": "tcp",
+      "host": "192.168.0.7",
+      "port": 502,
+      "slave": 1,
+      "relays": [
+        {"address": 1, "calendar_url_env": "RELAY_1_STATUS_URL"},
+        {"address": 2, "calendar_url": "https://script.google.com/macros/s/.../exec"},
+        {"address": 3, "calendar_type": "ical", "calendar_url": "/srv/agendas/sala.ics"}
+      ]
+    },
+    {
+      "name": "quadro-2",
+      "type": "serial",
+      "port": "COM3",
+      "baudrate": 9600,
+      "slave": 1,
+      "relays": [{"address": 1, "calendar_url_env": "RELAY_2_STATUS_URL"}]
+    }
+  ]
+}
+"""
+
+import json
+import os
+from dataclasses import dataclass
+
+# Parâmetros aceitos para cada tipo de conexão e seus valores padrão
+CONNECTION_DEFAULTS = {
+    "tcp": {"host": None, "port": 502, "timeout": 1},
+    "serial": {
+        "port": None,
+        "baudrate": 9600,
+        "stopbits": 1,
+        "parity": "N",
+        "bytesize": 8,
+        "timeout": 1,
+    },
+}
+
+# Tipos de agenda: API do Apps Script ou feed iCalendar (URL ou arquivo local)
+CALENDAR_TYPES = ("api", "ical")
+
+DEFAULT_CYCLE_INTERVAL = 30
+
+
+@dataclass(frozen=True)
+class RelayConfig:
+    """
+    Configuração de um relé.
+
+    :param address: Endereço do relé no barramento Modbus (1 baseado).
+    :param calendar_url: URL da agenda que define o estado do relé (ou caminho do arquivo,
+    para agendas do tipo 'ical').
+    :param calendar_type: Tipo da agenda ('api' ou 'ical').
+    """
+    address: int
+    calendar_url: str
+    calendar_type: str = "api"
+
+    @property
+    def calendar_key(self):
+        """
+        Chave que identifica a fonte de agenda, compartilhada entre relés com a mesma agenda.
+        """
+        return (self.calendar_type, self.calendar_url)
+
+
+@dataclass(frozen=True)
+class DeviceConfig:
+    """
+    Configuração de um dispositivo Modbus.
+
+    :param name: Nome único do dispositivo, utilizado como identificador no cache de estado.
+    :param connection: Tupla com o tipo de conexão e seus parâmetros, na forma
+    ('tcp', (('host', ...), ('port', ...), ...)). Dispositivos com a mesma conexão
+    compartilham o mesmo cliente Modbus (ex.: vários escravos em um barramento RS-485).
+    :param slave: ID do escravo Modbus.
+    :param relays: Tupla de RelayConfig.
+    """
+    name: str
+    connection: tuple
+    slave: int
+    relays: tuple
+
+    @property
+    def connection_type(self):
+        """
+        Tipo de conexão ('tcp' ou 'serial').
+        """
+        return self.connection[0]
+
+    @property
+    def connection_params(self):
+        """
+        Parâmetros da conexão como dicionário, prontos para o construtor do cliente Modbus.
+        """
+        return dict(self.connection[1])
+
+    @property
+    def bus(self):
+        """
+        Meio físico utilizado pelo dispositivo: a porta serial ou o endereço TCP.
+
+        Dispositivos no mesmo meio não podem ser acessados em paralelo e devem ser
+        controlados pelo mesmo processo.
+        """
+        params = self.connection_params
+        if self.connection_type == "tcp":
+            return ("tcp", params["host"], params["port"])
+        return (self.connection_type, params["port"])
+
+
+@dataclass(frozen=True)
+class ControllerConfig:
+    """
+    Configuração completa do controlador.
+
+    :param devices: Tupla de DeviceConfig.
+    :param cycle_interval: Intervalo, em segundos, entre as verificações.
+    """
+    devices: tuple
+    cycle_interval: float = DEFAULT_CYCLE_INTERVAL
+
+
+def _parse_number(value, description, number_type=int):
+    """
+    Converte um valor numérico da configuração, exigindo que seja positivo.
+
+    :param value: Valor lido do arquivo.
+    :param description: Descrição do valor, utilizada nas mensagens de erro.
+    :param number_type: Tipo do resultado (int ou float).
+    :return: Valor convertido.
+    :raises ValueError: Se o valor não for um número positivo.
+    """
+    # bool é subclasse de int, mas 'true' não é um número válido na configuração
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{description} inválido: {value!r}")
+    try:
+        number = number_type(value)
+    except ValueError:
+        raise ValueError(f"{description} inválido: {value!r}") from None
+    if not 0 < number < float("inf"):
+        raise ValueError(f"{description} deve ser maior que zero: {value!r}")
+    return number
+
+
+def _require_dict(data, description):
+    """
+    Verifica se um item da configuração é um objeto JSON.
+
+    :param data: Item lido do arquivo.
+    :param description: Descrição do item, utilizada nas mensagens de erro.
+    :raises ValueError: Se o item não for um objeto.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"{description} deve ser um objeto, não {type(data).__name__}")
+
+
+def _require_list(data, description):
+    """
+    Verifica se um item da configuração é uma lista JSON.
+
+    :param data: Item lido do arquivo.
+    :param description: Descrição do item, utilizada nas mensagens de erro.
+    :raises ValueError: Se o item não for uma lista.
+    """
+    if not isinstance(data, list):
+        raise ValueError(f"{description} deve ser uma lista, não {type(data).__name__}")
+
+
+def _parse_relay(device_name, data):
+    """
+    Converte a descrição de um relé em RelayConfig.
+
+    A URL da agenda pode ser informada diretamente (`calendar_url`) ou pelo nome de uma
+    variável de ambiente (`calendar_url_env`), mantendo URLs sensíveis no arquivo .env.
+
+    :param device_name: Nome do dispositivo, utilizado nas mensagens de erro.
+    :param data: Dicionário com a descrição do relé.
+    :return: Instância de RelayConfig.
+    :raises ValueError: Se a descrição for inválida.
+    """
+    _require_dict(data, f"Relé do dispositivo '{device_name}'")
+    if "address" not in data:
+        raise ValueError(f"Relé sem 'address' no dispositivo '{device_name}'")
+    address = _parse_number(
+        data["address"], f"Endereço de relé no dispositivo '{device_name}'"
+    )
+    calendar_url = data.get("calendar_url")
+    if calendar_url is None and "calendar_url_env" in data:
+        if not isinstance(data["calendar_url_env"], str):
+            raise ValueError(
+                f"'calendar_url_env' inválido no relé {address} do dispositivo '{device_name}'"
+            )
+        calendar_url = os.getenv(data["calendar_url_env"])
+        if calendar_url is None:
+            raise ValueError(
+                f"Variável de ambiente '{data['calendar_url_env']}' não definida "
+                f"(relé {address} do dispositivo '{device_name}')"
+            )
+    if not calendar_url:
+        raise ValueError(
+            f"Relé {address} do dispositivo '{device_name}' sem agenda configurada"
+        )
+    if not isinstance(calendar_url, str):
+        raise ValueError(
+            f"'calendar_url' inválido no relé {address} do dispositivo '{device_name}'"
+        )
+    calendar_type = data.get("calendar_type", "api")
+    if calendar_type not in CALENDAR_TYPES:
+        raise ValueError(
+            f"Tipo de agenda inválido no relé {address} do dispositivo "
+            f"'{device_name}': {calendar_type}"
+        )
+    return RelayConfig(address=address, calendar_url=calendar_url, calendar_type=calendar_type)
+
+
+def _parse_device(data):
+    """
+    Converte a descrição de um dispositivo em DeviceConfig.
+
+    :param data: Dicionário com a descrição do dispositivo.
+    :return: Instância de DeviceConfig.
+    :raises ValueError: Se a descrição for inválida.
+    """
+    _require_dict(data, "Dispositivo")
+    name = data.get("name")
+    if not name or not isinstance(name, str):
+        raise ValueError("Dispositivo sem 'name' na configuração")
+    connection_type = data.get("type")
+    if connection_type not in CONNECTION_DEFAULTS:
+        raise ValueError(f"Tipo de conexão inválido no dispositivo '{name}': {connection_type}")
+
+    params = []
+    for key, default in CONNECTION_DEFAULTS[connection_type].items():
+        value = data.get(key, default)
+        if value is None:
+            raise ValueError(f"Parâmetro '{key}' obrigatório no dispositivo '{name}'")
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError(f"Parâmetro '{key}' inválido no dispositivo '{name}': {value!r}")
+        params.append((key, value))
+
+    relays = data.get("relays", [])
+    _require_list(relays, f"'relays' do dispositivo '{name}'")
+    relays = tuple(_parse_relay(name, relay) for relay in relays)
+    addresses = [relay.address for relay in relays]
+    if len(addresses) != len(set(addresses)):
+        raise ValueError(f"Endereço de relé duplicado no dispositivo '{name}'")
+
+    return DeviceConfig(
+        name=name,
+        connection=(connection_type, tuple(params)),
+        slave=_parse_number(data.get("slave", 1), f"ID de escravo do dispositivo '{name}'"),
+        relays=relays,
+    )
+
+
+def parse_config(data):
+    """
+    Converte o conteúdo do arquivo de configuração em ControllerConfig.
+
+    Dispositivos no mesmo meio físico (porta serial ou endereço TCP) devem usar os mesmos
+    parâmetros de conexão, pois compartilham um único cliente Modbus.
+
+    :param data: Dicionário com a configuração.
+    :return: Instância de ControllerConfig.
+    :raises ValueError: Se a configuração for inválida.
+    """
+    _require_dict(data, "Configuração")
+    devices = data.get("devices", [])
+    _require_list(devices, "'devices'")
+    devices = tuple(_parse_device(device) for device in devices)
+    names = [device.name for device in devices]
+    if len(names) != len(set(names)):
+        raise ValueError("Nome de dispositivo duplicado na configuração")
+
+    connections = {}
+    for device in devices:
+        other = connections.setdefault(device.bus, device)
+        if other.connection != device.connection:
+            raise ValueError(
+                f"Dispositivos '{other.name}' e '{device.name}' usam o mesmo meio físico "
+                "com parâmetros de conexão diferentes"
+            )
+
+    return ControllerConfig(
+        devices=devices,
+        cycle_interval=_parse_number(
+            data.get("cycle_interval", DEFAULT_CYCLE_INTERVAL), "'cycle_interval'", float
+        ),
+    )
+
+
+def load_config(path):
+    """
+    Lê e valida o arquivo de configuração.
+
+    :param path: Caminho do arquivo JSON.
+    :return: Instância de ControllerConfig.
+    :raises OSError: Se o arquivo não puder ser lido.
+    :raises ValueError: Se o conteúdo for inválido.
+    """
+    with open(path, encoding="utf-8") as config_file:
+        return parse_config(json.load(config_file))
@@ -0,0 +1,223 @@
+"""
+Controle de um conjunto de dispositivos e relés descritos em uma configuração.
+
+A classe Fleet mantém os clientes Modbus abertos entre as verificações e permite aplicar
+uma nova configuração sem reiniciar o controlador: apenas os dispositivos, relés,
+conexões e agendas adicionados ou removidos são afetados. Conexões abertas, estados em
+cache e fontes de agenda que continuam em uso são preservados.
+
+Exemplo de uso:
+
+from relay_modbus_controller.config import load_config
+fleet = Fleet(state_cache=RelayStateCache())
+fleet.apply_config(load_config('config.json'))
+fleet.run_cycle()
+fleet.close()
+"""
+
+from pymodbus.exceptions import ConnectionException
+
+from relay_modbus_controller.config import ControllerConfig
+from relay_modbus_controller.modbus_serial_client import ModbusClient as ModbusClientSerial
+from relay_modbus_controller.modbus_tcp_client import ModbusClient as ModbusClientTCP
+from relay_modbus_controller.relay_controller import RelayController
+from calendar_integration.get_events import ApiCalendarSource
+from calendar_integration.ical_source import IcalCalendarSource
+from logger import logger
+
+CLIENT_CLASSES = {
+    "tcp": ModbusClientTCP,
+    "serial": ModbusClientSerial,
+}
+
+# Falhas do meio de comunicação (socket ou porta serial), que exigem reabrir a conexão.
+# As demais falhas, como a ausência de resposta de um escravo, afetam apenas o dispositivo.
+TRANSPORT_ERRORS = (ConnectionException, OSError)
+
+
+def describe_connection(connection):
+    """
+    Retorna uma descrição legível de uma conexão, para uso em logs.
+
+    :param connection: Tupla de conexão de um DeviceConfig.
+    :return: Texto como 'tcp 192.168.0.7:502' ou 'serial COM3'.
+    """
+    connection_type, params = connection
+    params = dict(params)
+    if connection_type == "tcp":
+        return f"tcp {params['host']}:{params['port']}"
+    return f"{connection_type} {params['port']}"
+
+
+def create_calendar_source(calendar_type, calendar_url):
+    """
+    Cria a fonte de agenda correspondente ao tipo configurado.
+
+    :param calendar_type: Tipo da agenda ('api' ou 'ical').
+    :param calendar_url: URL da agenda (ou caminho do arquivo, para o tipo 'ical').
+    :return: Objeto com o método `has_event()`.
+    """
+    if calendar_type == "ical":
+        return IcalCalendarSource(calendar_url)
+    return ApiCalendarSource(calendar_url)
+
+
+class Fleet:
+    """
+    Controla todos os relés descritos em uma ControllerConfig.
+
+    Os clientes Modbus são compartilhados entre os dispositivos que usam a mesma conexão
+    e as fontes de agenda entre os relés que usam a mesma agenda.
+    """
+
+    def __init__(self, state_cache=None):
+        """
+        Inicializa um controlador sem dispositivos.
+
+        :param state_cache: Instância opcional de RelayStateCache onde é registrado o
+        estado dos relés.
+        """
+        self.state_cache = state_cache
+        self.config = ControllerConfig(devices=())
+        self._clients = {}
+        self._controllers = {}
+        self._sources = {}
+        self._last_states = {}
+
+    def apply_config(self, config):
+        """
+        Aplica uma nova configuração, alterando apenas o que mudou.
+
+        Dispositivos cuja conexão ou ID de escravo mudaram são recriados; os demais são
+        mantidos, com os relés removidos retirados do cache de estado. Conexões e fontes
+        de agenda que deixaram de ser usadas são descartadas.
+
+        :param config: Nova instância de ControllerConfig.
+        """
+        old_devices = {device.name: device for device in self.config.devices}
+        new_devices = {device.name: device for device in config.devices}
+
+        for name, device in old_devices.items():
+            new_device = new_devices.get(name)
+            if new_device is None or (new_device.connection, new_device.slave) != (
+                device.connection, device.slave
+            ):
+                self._remove_relays(name, device.relays)
+                del self._controllers[name]
+                logger.info("Dispositivo removido: %s", name)
+                continue
+            kept = {relay.address for relay in new_device.relays}
+            self._remove_relays(
+                name, [relay for relay in device.relays if relay.address not in kept]
+            )
+            added = {relay.address for relay in new_device.relays} - {
+                relay.address for relay in device.relays
+            }
+            for address in sorted(added):
+                logger.info("Relé adicionado: %s/%s", name, address)
+
+        for name, device in new_devices.items():
+            if name in self._controllers:
+                continue
+            client = self._clients.get(device.connection)
+            if client is None:
+                client = CLIENT_CLASSES[device.connection_type](**device.connection_params)
+                self._clients[device.connection] = client
+                logger.info("Conexão adicionada: %s", describe_connection(device.connection))
+            self._controllers[name] = RelayController(
+                client, device.slave, state_cache=self.state_cache, device_id=name
+            )
+            logger.info("Dispositivo adicionado: %s (%d relés)", name, len(device.relays))
+
+        used_connections = {device.connection for device in config.devices}
+        for connection in list(self._clients):
+            if connection not in used_connections:
+                self._clients.pop(connection).close()
+                logger.info("Conexão removida: %s", describe_connection(connection))
+
+        used_calendars = {
+            relay.calendar_key for device in config.devices for relay in device.relays
+        }
+        for calendar_key in list(self._sources):
+            if calendar_key not in used_calendars:
+                del self._sources[calendar_key]
+        for calendar_key in used_calendars:
+            if calendar_key not in self._sources:
+                self._sources[calendar_key] = create_calendar_source(*calendar_key)
+
+        self.config = config
+
+    def _remove_relays(self, device_name, relays):
+        """
+        Remove relés do cache de estado e do histórico de estados registrados.
+
+        :param device_name: Nome do dispositivo.
+        :param relays: Relés a serem removidos.
+        """
+        for relay in relays:
+            relay_id = f"{device_name}/{relay.address}"
+            self._last_states.pop(relay_id, None)
+            if self.state_cache is not None:
+                self.state_cache.remove(relay_id)
+            logger.info("Relé removido: %s", relay_id)
+
+    def run_cycle(self):
+        """
+        Executa uma verificação de todos os relés.
+
+        Para cada dispositivo, conecta apenas se necessário e, em seguida, consulta a agenda
+        de cada relé e atualiza seu estado. Um erro em um dispositivo (ex.: um escravo que
+        não responde) é registrado e os demais dispositivos do barramento continuam sendo
+        verificados, reconectando antes do próximo se o cliente Modbus tiver fechado a
+        conexão. Em falhas do meio de comunicação, a conexão é fechada e os demais
+        dispositivos do barramento ficam para a próxima verificação.
+        """
+        for connection, client in self._clients.items():
+            for device in self.config.devices:
+                if device.connection != connection:
+                    continue
+                if not client.is_connected() and not client.connect():
+                    logger.error("Erro ao conectar ao Modbus: %s", describe_connection(connection))
+                    break
+                try:
+                    controller = self._controllers[device.name]
+                    for relay in device.relays:
+                        self._update_relay(controller, relay)
+                except TRANSPORT_ERRORS as e:
+                    logger.error("Erro de comunicação Modbus (%s): %s",
+                                 describe_connection(connection), e)
+                    client.close()
+                    break
+                except Exception as e:
+                    logger.error("Erro no dispositivo %s: %s", device.name, e)
+
+    def _update_relay(self, controller, relay):
+        """
+        Consulta a agenda do relé e atualiza seu estado.
+
+        Falhas na consulta da agenda são registradas e o relé é mantido como está.
+        Falhas de comunicação Modbus são propagadas.
+
+        :param controller: RelayController do dispositivo.
+        :param relay: RelayConfig do relé.
+        """
+        relay_id = controller.relay_id(relay.address)
+        try:
+            desired = self._sources[relay.calendar_key].has_event()
+        except Exception as e:
+            logger.error("Erro ao consultar a agenda do relé %s: %s", relay_id, e)
+            if self.state_cache is not None:
+                self.state_cache.set_error(relay_id, f"Erro ao consultar a agenda: {e}")
+            return
+
+        status = controller.set_relay_status(desired, relay.address)
+        if status != self._last_states.get(relay_id):
+            self._last_states[relay_id] = status
+            logger.info("Estado do Relé %s: %s", relay_id, 'Ligado' if status else 'Desligado')
+
+    def close(self):
+        """
+        Fecha todas as conexões Modbus.
+        """
+        for client in self._clients.values():
+            client.close()
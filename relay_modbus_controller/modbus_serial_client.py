@@ -52,6 +52,17 @@ class ModbusClient:
         """
         return self.client.connect()
 
+    def is_connected(self):
+        """
+        Verifica se a porta serial está aberta, sem tentar abri-la.
+
+        A propriedade `connected` do ModbusSerialClient abre a porta quando ela está
+        fechada, por isso o estado é obtido diretamente do socket do cliente.
+
+        :return: True se estiver conectado, False caso contrário.
+        """
+        return self.client.socket is not None
+
     def read_relay_status(self, relay_number, slave):
         """
         Lê o status de um relé específico.
@@ -47,6 +47,14 @@ class ModbusClient:
         """
         return self.client.connect()
 
+    def is_connected(self):
+        """
+        Verifica se a conexão com o servidor ModBus está aberta.
+
+        :return: True se estiver conectado, False caso contrário.
+        """
+        return self.client.connected
+
     def read_relay_status(self, relay_number, slave):
         """
         Lê o status de um relé específico.
@@ -17,6 +17,11 @@ from relay_modbus_controller.modbus_tcp_client import ModbusClient as ModbusClie
 modbus_client = ModbusClientTCP(host='192.168.1.100', port=502)
 relay_controller = RelayController(modbus_client, slave=1)
 relay_controller.set_relay_status(False, 1)  # Desliga o relé no endereço 1
+
+# Registrando os estados em um cache para leitura sem acesso ao barramento:
+from relay_modbus_controller.state_cache import RelayStateCache
+cache = RelayStateCache()
+relay_controller = RelayController(modbus_client, slave=1, state_cache=cache)
 """
 class RelayController:
     """
@@ -26,15 +31,29 @@ class RelayController:
     através de um cliente Modbus, que pode ser serial (RTU) ou TCP/IP.
     """
 
-    def __init__(self, modbus_client, slave):
+    def __init__(self, modbus_client, slave, state_cache=None, device_id=None):
         """
         Inicializa o controlador de relés.
 
         :param modbus_client: Instância de um cliente Modbus (RTU ou TCP).
         :param slave: ID do escravo Modbus.
+        :param state_cache: Instância opcional de RelayStateCache onde são registrados os
+        estados observados, desejados e os comandos pendentes.
+        :param device_id: Identificador do dispositivo no cache (padrão: 'slave-<ID>').
         """
         self.modbus_client = modbus_client
         self.slave = slave
+        self.state_cache = state_cache
+        self.device_id = device_id if device_id is not None else f"slave-{slave}"
+
+    def relay_id(self, relay_address):
+        """
+        Retorna o identificador do relé utilizado no cache de estado.
+
+        :param relay_address: Endereço do relé no barramento Modbus.
+        :return: Identificador no formato '<dispositivo>/<endereço>'.
+        """
+        return f"{self.device_id}/{relay_address}"
 
     def set_relay_status(self, relay_status, relay_address):
         """
@@ -44,6 +63,8 @@ class RelayController:
         :param relay_address: Endereço do relé no barramento Modbus.
         :return: Estado atualizado do relé após a operação.
         """
+        if self.state_cache is not None:
+            self.state_cache.set_desired(self.relay_id(relay_address), relay_status)
         current_relay_state = self.read_relay_state(relay_address)
         if relay_status and not current_relay_state:
             self.turn_on_relay(relay_address)
@@ -58,7 +79,7 @@ class RelayController:
         :param relay_address: Endereço do relé no barramento Modbus.
         :return: Estado atualizado do relé após a operação.
         """
-        self.modbus_client.write_coil(relay_address, True, self.slave)
+        self._write_coil(relay_address, True)
         return self.read_relay_state(relay_address)
 
     def turn_off_relay(self, relay_address):
@@ -68,9 +89,31 @@ class RelayController:
         :param relay_address: Endereço do relé no barramento Modbus.
         :return: Estado atualizado do relé após a operação.
         """
-        self.modbus_client.write_coil(relay_address, False, self.slave)
+        self._write_coil(relay_address, False)
         return self.read_relay_state(relay_address)
 
+    def _write_coil(self, relay_address, value):
+        """
+        Escreve na bobina do relé, registrando o comando como pendente no cache de estado.
+
+        Se a escrita falhar, o comando pendente é descartado e o erro é registrado.
+
+        :param relay_address: Endereço do relé no barramento Modbus.
+        :param value: Valor a ser escrito (True para ligar, False para desligar).
+        :raises Exception: Se houver erro ao escrever na bobina.
+        """
+        if self.state_cache is None:
+            self.modbus_client.write_coil(relay_address, value, self.slave)
+            return
+        relay_id = self.relay_id(relay_address)
+        self.state_cache.set_pending(relay_id, value)
+        try:
+            self.modbus_client.write_coil(relay_address, value, self.slave)
+        except Exception as e:
+            self.state_cache.set_pending(relay_id, None)
+            self.state_cache.set_error(relay_id, str(e))
+            raise
+
     def read_relay_state(self, relay_address):
         """
         Lê o estado atual do relé no endereço especificado.
@@ -78,4 +121,12 @@ class RelayController:
         :param relay_address: Endereço do relé no barramento Modbus.
         :return: Estado atual do relé (True para ligado, False para desligado).
         """
-        return self.modbus_client.read_relay_status(relay_address, self.slave)
+        try:
+            state = self.modbus_client.read_relay_status(relay_address, self.slave)
+        except Exception as e:
+            if self.state_cache is not None:
+                self.state_cache.set_error(self.relay_id(relay_address), str(e))
+            raise
+        if self.state_cache is not None:
+            self.state_cache.set_observed(self.relay_id(relay_address), state)
+        return state
@@ -0,0 +1,184 @@
+"""
+API HTTP local de leitura do estado dos relés.
+
+Este módulo expõe o conteúdo de um RelayStateCache via HTTP. Todas as respostas são
+montadas a partir da memória, de modo que qualquer número de leitores não gera
+tráfego adicional no barramento Modbus.
+
+Rotas disponíveis:
+  - GET /state: estado atual de todos os relés.
+  - GET /state?since=<versão>&timeout=<segundos>: long-poll; responde assim que a
+    versão do cache for diferente de `since` ou quando o tempo esgotar. Uma versão
+    menor que `since` indica que o controlador foi reiniciado.
+  - GET /state/stream: fluxo Server-Sent Events, enviando o estado a cada mudança.
+  - GET /relays/<id>: estado de um único relé (ex.: /relays/slave-1/1).
+  - GET /metrics: métricas do controlador, quando disponíveis (ex.: execução em vários
+    processos).
+
+Exemplo de uso:
+
+cache = RelayStateCache()
+server = start_state_api(cache, host='127.0.0.1', port=8080)
+...
+server.shutdown()
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from logger import logger
+
+# Limite para a espera do long-poll, evitando conexões presas indefinidamente
+MAX_POLL_TIMEOUT = 60
+# Intervalo máximo sem mensagens no fluxo SSE; um comentário mantém a conexão viva
+STREAM_KEEPALIVE = 15
+
+
+class StateRequestHandler(BaseHTTPRequestHandler):
+    """
+    Trata as requisições de leitura do estado dos relés.
+
+    O cache e a função de métricas são obtidos a partir do servidor (atributos `state_cache`
+    e `metrics`).
+    """
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Encaminha a requisição GET para a rota correspondente.
+        """
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        cache = self.server.state_cache
+
+        if url.path == "/state":
+            if "since" in query:
+                try:
+                    since = int(query["since"][0])
+                    timeout = min(float(query.get("timeout", [30])[0]), MAX_POLL_TIMEOUT)
+                except ValueError:
+                    self._send_json(400, {"error": "Parâmetros 'since'/'timeout' inválidos"})
+                    return
+                self._send_json(200, cache.wait_for_change(since, max(timeout, 0)))
+            else:
+                self._send_json(200, cache.snapshot())
+        elif url.path == "/state/stream":
+            self._stream(cache)
+        elif url.path == "/metrics" and self.server.metrics is not None:
+            self._send_json(200, self.server.metrics())
+        elif url.path.startswith("/relays/"):
+            # Os nomes dos dispositivos são livres e podem conter espaços ou acentos
+            relay_id = unquote(url.path[len("/relays/"):])
+            snapshot = cache.snapshot()
+            relay = snapshot["relays"].get(relay_id)
+            if relay is None:
+                self._send_json(404, {"error": f"Relé '{relay_id}' não encontrado"})
+            else:
+                self._send_json(200, {"version": snapshot["version"], "relay": relay})
+        else:
+            self._send_json(404, {"error": "Rota não encontrada"})
+
+    def _send_json(self, status, payload):
+        """
+        Envia uma resposta JSON.
+
+        :param status: Código de status HTTP.
+        :param payload: Objeto a ser serializado.
+        """
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, cache):
+        """
+        Envia o estado no formato Server-Sent Events a cada mudança do cache, até que
+        o cliente encerre a conexão ou o servidor seja desligado.
+
+        :param cache: Cache de estado dos relés.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        snapshot = cache.snapshot()
+        try:
+            self._write_event(snapshot)
+            version = snapshot["version"]
+            while not self.server.stopping.is_set():
+                snapshot = cache.wait_for_change(version, STREAM_KEEPALIVE)
+                if snapshot["version"] == version:
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                version = snapshot["version"]
+                self._write_event(snapshot)
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("Cliente encerrou o fluxo de estado.")
+
+    def _write_event(self, snapshot):
+        """
+        Escreve um evento SSE com o estado informado.
+
+        :param snapshot: Cópia do cache a ser enviada.
+        """
+        data = json.dumps(snapshot)
+        self.wfile.write(f"id: {snapshot['version']}\ndata: {data}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Redireciona o log de acesso do servidor HTTP para o logger do projeto.
+        """
+        logger.debug("API de estado: %s - %s", self.address_string(), format % args)
+
+
+class StateApiServer(ThreadingHTTPServer):
+    """
+    Servidor HTTP multithread que atende às leituras do cache de estado.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, state_cache, metrics=None):
+        """
+        Inicializa o servidor.
+
+        :param address: Tupla (host, porta) onde o servidor irá escutar.
+        :param state_cache: Instância de RelayStateCache a ser exposta.
+        :param metrics: Função opcional, sem argumentos, que retorna as métricas do controlador.
+        """
+        super().__init__(address, StateRequestHandler)
+        self.state_cache = state_cache
+        self.metrics = metrics
+        self.stopping = threading.Event()
+
+    def shutdown(self):
+        """
+        Encerra o servidor e os fluxos SSE abertos.
+        """
+        self.stopping.set()
+        super().shutdown()
+        self.server_close()
+
+
+def start_state_api(state_cache, host="127.0.0.1", port=8080, metrics=None):
+    """
+    Inicia a API de estado em uma thread em segundo plano.
+
+    :param state_cache: Instância de RelayStateCache a ser exposta.
+    :param host: Endereço onde o servidor irá escutar (padrão: apenas local).
+    :param port: Porta TCP do servidor (padrão: 8080).
+    :param metrics: Função opcional, sem argumentos, que retorna as métricas do controlador.
+    :return: Instância do servidor, que pode ser encerrada com `shutdown()`.
+    """
+    server = StateApiServer((host, port), state_cache, metrics)
+    thread = threading.Thread(target=server.serve_forever, name="state-api", daemon=True)
+    thread.start()
+    logger.info("API de estado disponível em http://%s:%s/state", host, port)
+    return server
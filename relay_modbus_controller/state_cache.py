@@ -0,0 +1,219 @@
+"""
+Cache em memória do estado dos relés.
+
+Este módulo mantém, para cada relé controlado, o último estado observado no barramento,
+o estado desejado (calculado a partir da agenda), os instantes da última atualização e
+o comando que ainda aguarda confirmação. Leitores externos (API local, dashboards)
+consultam apenas este cache, sem gerar tráfego Modbus.
+
+Exemplo de uso:
+
+cache = RelayStateCache()
+cache.set_desired("slave-1/1", True)
+cache.set_observed("slave-1/1", True)
+snapshot = cache.snapshot()
+"""
+
+import threading
+import time
+
+# Campos cuja mudança altera a versão do cache; os instantes de atualização não a alteram
+VALUE_FIELDS = ("observed", "desired", "pending", "error")
+
+
+class RelayStateCache:
+    """
+    Cache thread-safe do estado dos relés.
+
+    Cada alteração relevante (estado observado, desejado, comando pendente ou erro)
+    incrementa a versão do cache e acorda os leitores que aguardam mudanças. A simples
+    renovação dos instantes de atualização não altera a versão.
+    """
+
+    def __init__(self):
+        """
+        Inicializa um cache vazio.
+        """
+        self._relays = {}
+        self._version = 0
+        self._condition = threading.Condition()
+
+    @property
+    def version(self):
+        """
+        Versão atual do cache, incrementada a cada mudança de estado.
+        """
+        with self._condition:
+            return self._version
+
+    def _entry(self, relay_id):
+        """
+        Retorna o registro do relé, criando-o se necessário.
+
+        Deve ser chamado com o lock do cache adquirido.
+
+        :param relay_id: Identificador do relé (ex.: 'slave-1/1').
+        :return: Dicionário com o estado do relé.
+        """
+        entry = self._relays.get(relay_id)
+        if entry is None:
+            entry = {
+                "observed": None,
+                "observed_at": None,
+                "desired": None,
+                "desired_at": None,
+                "pending": None,
+                "pending_since": None,
+                "error": None,
+                "error_at": None,
+            }
+            self._relays[relay_id] = entry
+        return entry
+
+    def _set(self, relay_id, field, value):
+        """
+        Atualiza um campo do relé e o instante associado.
+
+        Deve ser chamado com o lock do cache adquirido. Um comando pendente repetido
+        mantém o instante do primeiro envio.
+
+        :param relay_id: Identificador do relé.
+        :param field: Nome do campo ('observed', 'desired', 'pending' ou 'error').
+        :param value: Novo valor do campo.
+        :return: True se o valor do campo mudou, False caso contrário.
+        """
+        entry = self._entry(relay_id)
+        timestamp_field = "pending_since" if field == "pending" else f"{field}_at"
+        changed = entry[field] != value
+        if changed or field != "pending":
+            entry[timestamp_field] = time.time() if value is not None else None
+        entry[field] = value
+        return changed
+
+    def _update(self, relay_id, **fields):
+        """
+        Atualiza um ou mais campos do relé de forma atômica, notificando os leitores
+        se algum valor mudou. O lock é reentrante, podendo ser chamado com ele adquirido.
+
+        :param relay_id: Identificador do relé.
+        :param fields: Campos e seus novos valores.
+        """
+        with self._condition:
+            changed = False
+            for field, value in fields.items():
+                changed |= self._set(relay_id, field, value)
+            if changed:
+                self._version += 1
+                self._condition.notify_all()
+
+    def set_observed(self, relay_id, state):
+        """
+        Registra o estado lido do relé no barramento.
+
+        Uma leitura bem-sucedida limpa o último erro e, se houver um comando pendente
+        com o mesmo valor, ele é considerado confirmado e removido.
+
+        :param relay_id: Identificador do relé.
+        :param state: Estado lido (True para ligado, False para desligado).
+        """
+        fields = {"observed": state, "error": None}
+        with self._condition:
+            if self._entry(relay_id)["pending"] == state:
+                fields["pending"] = None
+            self._update(relay_id, **fields)
+
+    def set_desired(self, relay_id, state):
+        """
+        Registra o estado desejado para o relé.
+
+        :param relay_id: Identificador do relé.
+        :param state: Estado desejado (True para ligado, False para desligado).
+        """
+        self._update(relay_id, desired=state)
+
+    def set_pending(self, relay_id, state):
+        """
+        Registra um comando enviado ao relé que ainda não foi confirmado por leitura.
+
+        :param relay_id: Identificador do relé.
+        :param state: Valor escrito na bobina.
+        """
+        self._update(relay_id, pending=state)
+
+    def set_error(self, relay_id, message):
+        """
+        Registra o último erro de comunicação com o relé.
+
+        :param relay_id: Identificador do relé.
+        :param message: Descrição do erro.
+        """
+        self._update(relay_id, error=message)
+
+    def remove(self, relay_id):
+        """
+        Remove um relé do cache.
+
+        :param relay_id: Identificador do relé.
+        """
+        with self._condition:
+            if self._relays.pop(relay_id, None) is not None:
+                self._version += 1
+                self._condition.notify_all()
+
+    def merge(self, relays, removed=()):
+        """
+        Incorpora o estado de relés mantido por outro cache (ex.: de um processo de trabalho).
+
+        Os registros são sempre substituídos, mantendo os instantes de atualização em dia,
+        mas a versão só muda se algum valor mudar ou se relés forem adicionados ou removidos.
+
+        :param relays: Dicionário {identificador: registro}, como em `snapshot()['relays']`.
+        :param removed: Identificadores de relés que deixaram de existir.
+        """
+        with self._condition:
+            changed = False
+            for relay_id in removed:
+                changed |= self._relays.pop(relay_id, None) is not None
+            for relay_id, entry in relays.items():
+                current = self._relays.get(relay_id)
+                if current is None or any(
+                    current.get(field) != entry.get(field) for field in VALUE_FIELDS
+                ):
+                    changed = True
+                self._relays[relay_id] = dict(entry)
+            if changed:
+                self._version += 1
+                self._condition.notify_all()
+
+    def snapshot(self):
+        """
+        Retorna uma cópia consistente do conteúdo do cache.
+
+        :return: Dicionário com a versão e o estado de cada relé.
+        """
+        with self._condition:
+            return self._snapshot()
+
+    def _snapshot(self):
+        """
+        Monta a cópia do cache. Deve ser chamado com o lock adquirido.
+        """
+        return {
+            "version": self._version,
+            "relays": {relay_id: dict(entry) for relay_id, entry in self._relays.items()},
+        }
+
+    def wait_for_change(self, since_version, timeout):
+        """
+        Aguarda até que a versão do cache seja diferente de `since_version`.
+
+        Uma versão conhecida maior que a atual indica que o cache foi recriado (ex.: após
+        reiniciar o controlador); nesse caso, a cópia atual é retornada imediatamente.
+
+        :param since_version: Última versão conhecida pelo leitor.
+        :param timeout: Tempo máximo de espera em segundos.
+        :return: Cópia do cache (com a mesma versão se o tempo esgotar).
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._version != since_version, timeout)
+            return self._snapshot()
@@ -0,0 +1,338 @@
+"""
+Execução do controlador em vários processos.
+
+O Supervisor divide os dispositivos configurados em grupos (shards) e executa cada grupo em
+um processo de trabalho com sua própria instância de Fleet, contornando o limite de um único
+núcleo imposto pelo GIL. Todos os dispositivos de um mesmo meio físico (porta serial ou
+endereço TCP) ficam no mesmo processo. Novos meios físicos são atribuídos ao processo menos
+carregado, e os já atribuídos permanecem no mesmo processo entre recargas de configuração,
+de modo que uma conexão não muda de processo sem necessidade.
+
+Os processos enviam periodicamente o estado dos relés e suas métricas ao Supervisor, que os
+reúne em um único RelayStateCache e reinicia os processos que terminarem inesperadamente.
+
+Exemplo de uso:
+
+supervisor = Supervisor(worker_count=4, state_cache=RelayStateCache())
+supervisor.apply_config(load_config('config.json'))
+while True:
+    supervisor.poll(1)
+"""
+
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+
+from relay_modbus_controller.config import ControllerConfig
+from relay_modbus_controller.fleet import Fleet
+from relay_modbus_controller.state_cache import RelayStateCache
+from logger import logger
+
+# Tempo de espera, em segundos, antes de reiniciar um processo que terminou
+DEFAULT_RESTART_DELAY = 5
+# Tempo máximo, em segundos, para os processos encerrarem antes de serem finalizados
+STOP_TIMEOUT = 10
+
+
+def bus_load(devices):
+    """
+    Estima o custo de verificação de um barramento pelo número de relés e dispositivos.
+
+    :param devices: Dispositivos do barramento.
+    :return: Carga estimada.
+    """
+    return sum(len(device.relays) + 1 for device in devices)
+
+
+def shard_config(config, shard_count, assignments=None):
+    """
+    Divide a configuração em `shard_count` partes.
+
+    Todos os dispositivos de um mesmo meio físico ficam na mesma parte. Meios físicos já
+    atribuídos em `assignments` permanecem na mesma parte, para que uma recarga não mova
+    conexões entre processos; os novos são distribuídos, do mais carregado para o menos
+    carregado, na parte com a menor carga no momento.
+
+    :param config: Instância de ControllerConfig.
+    :param shard_count: Número de partes.
+    :param assignments: Dicionário {meio físico: índice da parte} da divisão anterior.
+    :return: Tupla (lista de ControllerConfig, uma por parte; nova atribuição dos meios).
+    """
+    assignments = assignments or {}
+    buses = {}
+    for device in config.devices:
+        buses.setdefault(device.bus, []).append(device)
+
+    new_assignments = {}
+    loads = [0] * shard_count
+    for bus, devices in buses.items():
+        index = assignments.get(bus)
+        if index is not None and index < shard_count:
+            new_assignments[bus] = index
+            loads[index] += bus_load(devices)
+
+    pending = [bus for bus in buses if bus not in new_assignments]
+    pending.sort(key=lambda bus: (-bus_load(buses[bus]), repr(bus)))
+    for bus in pending:
+        index = loads.index(min(loads))
+        new_assignments[bus] = index
+        loads[index] += bus_load(buses[bus])
+
+    shards = [[] for _ in range(shard_count)]
+    for device in config.devices:
+        shards[new_assignments[device.bus]].append(device)
+    configs = [
+        ControllerConfig(devices=tuple(devices), cycle_interval=config.cycle_interval)
+        for devices in shards
+    ]
+    return configs, new_assignments
+
+
+def run_worker(shard_index, config, config_queue, updates_queue, stop_event):
+    """
+    Laço principal de um processo de trabalho.
+
+    Controla os dispositivos da parte recebida e, após cada verificação, envia ao Supervisor
+    as métricas e o estado dos relés. Novas configurações recebidas
+    pela fila são aplicadas com `Fleet.apply_config`, preservando as conexões abertas.
+
+    :param shard_index: Índice da parte controlada por este processo.
+    :param config: ControllerConfig inicial da parte.
+    :param config_queue: Fila de novas configurações enviadas pelo Supervisor.
+    :param updates_queue: Fila de estado e métricas enviados ao Supervisor.
+    :param stop_event: Evento sinalizado pelo Supervisor para encerrar o processo.
+    """
+    # Interrupções e recargas são tratadas apenas pelo Supervisor
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    state_cache = RelayStateCache()
+    fleet = Fleet(state_cache=state_cache)
+    fleet.apply_config(config)
+    cycles = 0
+
+    try:
+        while not stop_event.is_set():
+            started = time.monotonic()
+            fleet.run_cycle()
+            duration = time.monotonic() - started
+            cycles += 1
+
+            interval = fleet.config.cycle_interval
+            if duration > interval:
+                logger.warning("Processo %d: verificação levou %.1f s (intervalo de %.1f s)",
+                               shard_index, duration, interval)
+
+            # O estado é enviado a cada verificação para manter atualizados os instantes
+            # de leitura, que não alteram a versão do cache
+            updates_queue.put((shard_index, state_cache.snapshot(), {
+                "cycles": cycles,
+                "last_cycle_duration": duration,
+                "last_cycle_at": time.time(),
+                "devices": len(fleet.config.devices),
+                "relays": sum(len(device.relays) for device in fleet.config.devices),
+            }))
+
+            deadline = started + interval
+            while not stop_event.is_set() and (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    new_config = config_queue.get(timeout=min(remaining, 1))
+                except queue.Empty:
+                    continue
+                fleet.apply_config(new_config)
+                break
+    finally:
+        fleet.close()
+        # Atualizações ainda não lidas pelo Supervisor não impedem o encerramento
+        updates_queue.cancel_join_thread()
+
+
+class Supervisor:
+    """
+    Gerencia os processos de trabalho e reúne o estado e as métricas de todos eles.
+
+    Oferece a mesma interface de configuração de Fleet (`apply_config`, `close` e o
+    atributo `config`), podendo substituí-la no script principal.
+    """
+
+    def __init__(self, worker_count, state_cache=None, restart_delay=DEFAULT_RESTART_DELAY):
+        """
+        Inicializa o Supervisor sem processos em execução.
+
+        :param worker_count: Número de processos de trabalho.
+        :param state_cache: Instância opcional de RelayStateCache que recebe o estado de
+        todos os processos.
+        :param restart_delay: Espera, em segundos, antes de reiniciar um processo.
+        """
+        self.worker_count = worker_count
+        self.state_cache = state_cache
+        self.restart_delay = restart_delay
+        self.config = ControllerConfig(devices=())
+
+        # O método 'spawn' é o único disponível no Windows e evita copiar threads do pai
+        self._context = multiprocessing.get_context("spawn")
+        self._updates_queue = self._context.Queue()
+        self._stop_event = self._context.Event()
+        self._shard_configs = [self.config] * worker_count
+        self._bus_assignments = {}
+        self._workers = [None] * worker_count
+        self._config_queues = [None] * worker_count
+        self._restart_at = [None] * worker_count
+        self._relay_ids = [set() for _ in range(worker_count)]
+        # Parte responsável por cada relé, segundo a configuração atual
+        self._relay_owners = {}
+        self._metrics = [{"restarts": 0} for _ in range(worker_count)]
+        # As métricas também são lidas pela thread da API de estado
+        self._metrics_lock = threading.Lock()
+
+    def apply_config(self, config):
+        """
+        Distribui uma nova configuração entre os processos.
+
+        Processos ainda não iniciados são criados; os demais recebem apenas a sua parte,
+        que é aplicada por diferença sem derrubar as conexões abertas.
+
+        :param config: Nova instância de ControllerConfig.
+        """
+        shards, self._bus_assignments = shard_config(
+            config, self.worker_count, self._bus_assignments
+        )
+        self._relay_owners = {
+            f"{device.name}/{relay.address}": index
+            for index, shard in enumerate(shards)
+            for device in shard.devices
+            for relay in device.relays
+        }
+        for index, shard in enumerate(shards):
+            changed = shard != self._shard_configs[index]
+            self._shard_configs[index] = shard
+            if self._workers[index] is None:
+                self._start_worker(index)
+            elif changed:
+                self._config_queues[index].put(shard)
+        self.config = config
+
+    def _start_worker(self, index):
+        """
+        Inicia o processo de trabalho de uma parte com a sua configuração atual.
+
+        :param index: Índice da parte.
+        """
+        self._config_queues[index] = self._context.Queue()
+        worker = self._context.Process(
+            target=run_worker,
+            name=f"relay-worker-{index}",
+            args=(index, self._shard_configs[index], self._config_queues[index],
+                  self._updates_queue, self._stop_event),
+            daemon=True,
+        )
+        worker.start()
+        with self._metrics_lock:
+            self._workers[index] = worker
+        self._restart_at[index] = None
+        logger.info("Processo %d iniciado (pid %s, %d dispositivos)",
+                    index, worker.pid, len(self._shard_configs[index].devices))
+
+    def poll(self, timeout):
+        """
+        Recebe o estado e as métricas enviados pelos processos e reinicia os que terminaram.
+
+        :param timeout: Tempo máximo, em segundos, de espera pela primeira atualização.
+        """
+        try:
+            update = self._updates_queue.get(timeout=timeout)
+            while True:
+                self._handle_update(*update)
+                update = self._updates_queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._check_workers()
+
+    def _handle_update(self, index, snapshot, metrics):
+        """
+        Incorpora uma atualização recebida de um processo.
+
+        :param index: Índice da parte que enviou a atualização.
+        :param snapshot: Cópia do cache do processo.
+        :param metrics: Métricas da última verificação.
+        """
+        with self._metrics_lock:
+            self._metrics[index].update(metrics)
+        # Após uma recarga, um processo pode enviar relés que já passaram para outra parte;
+        # apenas o responsável atual atualiza ou remove cada relé
+        relays = {
+            relay_id: entry for relay_id, entry in snapshot["relays"].items()
+            if self._relay_owners.get(relay_id) == index
+        }
+        removed = {
+            relay_id for relay_id in self._relay_ids[index] - relays.keys()
+            if self._relay_owners.get(relay_id) in (None, index)
+        }
+        self._relay_ids[index] = set(relays)
+        if self.state_cache is not None:
+            self.state_cache.merge(relays, removed)
+
+    def _check_workers(self):
+        """
+        Reinicia, após `restart_delay` segundos, os processos que terminaram.
+        """
+        if self._stop_event.is_set():
+            return
+        now = time.monotonic()
+        for index, worker in enumerate(self._workers):
+            if worker is None or worker.is_alive():
+                continue
+            if self._restart_at[index] is None:
+                logger.error("Processo %d (pid %s) terminou com código %s; reiniciando em %s s",
+                             index, worker.pid, worker.exitcode, self.restart_delay)
+                self._restart_at[index] = now + self.restart_delay
+            elif now >= self._restart_at[index]:
+                # O processo encerrado é descartado sob o lock, pois `metrics` o consulta;
+                # o novo é iniciado fora dele, já que a criação com 'spawn' é demorada
+                with self._metrics_lock:
+                    worker.close()
+                    self._workers[index] = None
+                    self._metrics[index]["restarts"] += 1
+                self._start_worker(index)
+
+    def metrics(self):
+        """
+        Retorna uma visão consolidada das métricas de todos os processos.
+
+        :return: Dicionário com os totais e as métricas de cada processo.
+        """
+        workers = []
+        with self._metrics_lock:
+            for index, worker in enumerate(self._workers):
+                workers.append({
+                    "index": index,
+                    "pid": worker.pid if worker is not None else None,
+                    "alive": worker is not None and worker.is_alive(),
+                    **self._metrics[index],
+                })
+        return {
+            "workers": workers,
+            "devices": len(self.config.devices),
+            "relays": sum(len(device.relays) for device in self.config.devices),
+            "max_cycle_duration": max(
+                (worker.get("last_cycle_duration", 0) for worker in workers), default=0
+            ),
+        }
+
+    def close(self):
+        """
+        Encerra todos os processos, finalizando os que não terminarem a tempo.
+        """
+        self._stop_event.set()
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for worker in self._workers:
+            if worker is None:
+                continue
+            worker.join(max(deadline - time.monotonic(), 0))
+            if worker.is_alive():
+                logger.warning("Processo %s não encerrou a tempo; finalizando", worker.pid)
+                worker.terminate()
+                worker.join()
@@ -0,0 +1,180 @@
+"""
+Script de controle de relés a partir de um arquivo de configuração, com recarga a quente.
+
+Este script realiza as seguintes operações:
+  - Lê o arquivo de configuração (variável RELAY_CONFIG_FILE, padrão: 'config.json') com os
+    dispositivos Modbus, os relés e a agenda de cada relé.
+  - Em um loop infinito, consulta as agendas e liga ou desliga os relés, mantendo as conexões
+    Modbus abertas entre as verificações.
+  - Recarrega a configuração ao receber o sinal SIGHUP ou quando o arquivo é modificado.
+    Apenas os dispositivos e relés adicionados ou removidos são afetados; conexões abertas,
+    estados em cache e agendas em uso são preservados.
+  - Opcionalmente, expõe o estado dos relés em cache via API HTTP local (variável STATE_API_PORT).
+  - Opcionalmente, divide os dispositivos entre vários processos (variável RELAY_WORKERS),
+    reunindo o estado e as métricas de todos eles e reiniciando os processos que falharem.
+
+Requisitos:
+  - O arquivo de configuração deve existir e ser válido (ver relay_modbus_controller/config.py).
+  - Os módulos necessários (p.ex.: relay_modbus_controller, calendar_integration, logger)
+  devem estar corretamente instalados e configurados.
+"""
+
+import os
+import signal
+import threading
+from time import monotonic
+from dotenv import load_dotenv
+
+from relay_modbus_controller.config import load_config
+from relay_modbus_controller.fleet import Fleet
+from relay_modbus_controller.supervisor import Supervisor
+from relay_modbus_controller.state_cache import RelayStateCache
+from relay_modbus_controller.state_api import start_state_api
+from logger import logger
+
+# Carrega as variáveis de ambiente a partir do arquivo .env
+load_dotenv()
+
+config_path = os.getenv("RELAY_CONFIG_FILE", "config.json")
+
+# Configuração opcional da API local de leitura do estado dos relés
+state_api_host = os.getenv("STATE_API_HOST", "127.0.0.1")
+state_api_port = os.getenv("STATE_API_PORT")
+
+# Número de processos de trabalho; com 1 (padrão), tudo é executado no processo principal
+worker_count = int(os.getenv("RELAY_WORKERS", "1"))
+
+# Intervalo, em segundos, entre as verificações de modificação do arquivo de configuração
+CONFIG_WATCH_INTERVAL = 1
+
+
+def config_mtime():
+    """
+    Retorna o instante da última modificação do arquivo de configuração.
+
+    :return: Instante da modificação ou None se o arquivo não puder ser acessado.
+    """
+    try:
+        return os.stat(config_path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def wait_next_cycle(interval, reload_requested, mtime):
+    """
+    Aguarda a próxima verificação, retornando antes se a recarga for solicitada.
+
+    :param interval: Tempo de espera em segundos.
+    :param reload_requested: Evento sinalizado pelo tratador de SIGHUP.
+    :param mtime: Instante de modificação do arquivo na última carga.
+    :return: True se a configuração deve ser recarregada, False caso contrário.
+    """
+    deadline = monotonic() + interval
+    while (remaining := deadline - monotonic()) > 0:
+        if reload_requested.wait(min(CONFIG_WATCH_INTERVAL, remaining)):
+            return True
+        if config_mtime() != mtime:
+            return True
+    return False
+
+
+def reload_config(fleet):
+    """
+    Recarrega o arquivo de configuração e aplica as diferenças ao controlador.
+
+    Se o novo arquivo for inválido, o erro é registrado e a configuração atual é mantida.
+
+    :param fleet: Instância de Fleet ou Supervisor em execução.
+    """
+    try:
+        config = load_config(config_path)
+    except (OSError, ValueError) as e:
+        logger.error("Configuração inválida, mantendo a atual: %s", e)
+        return
+    fleet.apply_config(config)
+    logger.info("Configuração recarregada de %s", config_path)
+
+
+def run_single(fleet, reload_requested, mtime):
+    """
+    Executa as verificações no processo principal.
+
+    :param fleet: Instância de Fleet com a configuração carregada.
+    :param reload_requested: Evento sinalizado pelo tratador de SIGHUP.
+    :param mtime: Instante de modificação do arquivo na carga inicial.
+    """
+    while True:
+        fleet.run_cycle()
+
+        if wait_next_cycle(fleet.config.cycle_interval, reload_requested, mtime):
+            reload_requested.clear()
+            mtime = config_mtime()
+            reload_config(fleet)
+
+
+def run_supervised(supervisor, reload_requested, mtime):
+    """
+    Acompanha os processos de trabalho, que executam as verificações.
+
+    :param supervisor: Instância de Supervisor com a configuração carregada.
+    :param reload_requested: Evento sinalizado pelo tratador de SIGHUP.
+    :param mtime: Instante de modificação do arquivo na carga inicial.
+    """
+    while True:
+        supervisor.poll(CONFIG_WATCH_INTERVAL)
+
+        if reload_requested.is_set() or config_mtime() != mtime:
+            reload_requested.clear()
+            mtime = config_mtime()
+            reload_config(supervisor)
+
+
+def main():
+    """
+    Função principal para o controle dos relés.
+
+    Carrega a configuração, instala o tratador de SIGHUP (quando disponível no sistema) e,
+    em um loop infinito, verifica todos os relés e aguarda o intervalo configurado,
+    recarregando a configuração quando solicitado. Com RELAY_WORKERS maior que 1, as
+    verificações são feitas pelos processos de trabalho e o processo principal apenas
+    reúne os resultados.
+
+    O loop pode ser interrompido pelo usuário (Ctrl+C), e as conexões Modbus serão
+    fechadas corretamente.
+    """
+    state_cache = RelayStateCache()
+    if worker_count > 1:
+        controller = Supervisor(worker_count, state_cache=state_cache)
+    else:
+        controller = Fleet(state_cache=state_cache)
+    mtime = config_mtime()
+    controller.apply_config(load_config(config_path))
+
+    # SIGHUP não existe no Windows; nesse caso apenas a modificação do arquivo é observada
+    reload_requested = threading.Event()
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda signum, frame: reload_requested.set())
+
+    # Inicia a API local de leitura do estado, se configurada
+    state_api = None
+    if state_api_port:
+        metrics = controller.metrics if worker_count > 1 else None
+        state_api = start_state_api(state_cache, host=state_api_host, port=int(state_api_port),
+                                    metrics=metrics)
+
+    try:
+        if worker_count > 1:
+            run_supervised(controller, reload_requested, mtime)
+        else:
+            run_single(controller, reload_requested, mtime)
+    except KeyboardInterrupt:
+        # Interrompe o loop caso o usuário pressione Ctrl+C
+        logger.info("Interrupção pelo usuário. Encerrando o script.")
+    finally:
+        # Assegura que as conexões Modbus (e os processos de trabalho) sejam encerrados
+        controller.close()
+        if state_api is not None:
+            state_api.shutdown()
+
+if __name__ == "__main__":
+    main()
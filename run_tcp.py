@@ -9,6 +9,8 @@ Este script realiza as seguintes operações:
     um evento ativo e, com base na resposta, liga ou desliga os relés.
   - Após cada verificação, a conexão é fechada e o script aguarda 30 segundos antes da próxima
     iteração.
+  - Opcionalmente, expõe o estado dos relés em cache via API HTTP local (variável STATE_API_PORT),
+    sem gerar tráfego adicional no barramento Modbus.
 
 Requisitos:
   - As variáveis de ambiente RELAY_1_STATUS_URL e RELAY_2_STATUS_URL devem estar definidas no .env.
@@ -24,6 +26,8 @@ from dotenv import load_dotenv
 # Importa o cliente Modbus Serial, o controlador de relés e a função de verificação de eventos.
 from relay_modbus_controller.modbus_tcp_client import ModbusClient
 from relay_modbus_controller.relay_controller import RelayController
+from relay_modbus_controller.state_cache import RelayStateCache
+from relay_modbus_controller.state_api import start_state_api
 from calendar_integration.get_events import has_event
 from logger import logger
 
@@ -34,6 +38,10 @@ load_dotenv()
 relay_1_status_url = os.getenv("RELAY_1_STATUS_URL")
 relay_2_status_url = os.getenv("RELAY_2_STATUS_URL")
 
+# Configuração opcional da API local de leitura do estado dos relés
+state_api_host = os.getenv("STATE_API_HOST", "127.0.0.1")
+state_api_port = os.getenv("STATE_API_PORT")
+
 def main():
     """
     Função principal para o controle dos relés.
@@ -52,8 +60,16 @@ def main():
     # Inicializa o cliente Modbus para comunicação TCP
     client = ModbusClient("192.168.0.7", port=502)
 
+    # Cache com o estado dos relés, consultado pela API sem acessar o barramento
+    state_cache = RelayStateCache()
+
     # Inicializa o controlador de relés
-    relay_controller = RelayController(client, 1)
+    relay_controller = RelayController(client, 1, state_cache=state_cache)
+
+    # Inicia a API local de leitura do estado, se configurada
+    state_api = None
+    if state_api_port:
+        state_api = start_state_api(state_cache, host=state_api_host, port=int(state_api_port))
 
     # Obtém e armazena os estados iniciais dos relés 1 e 2
     relay_1_status = relay_controller.read_relay_state(1)
@@ -90,6 +106,8 @@ def main():
     finally:
         # Assegura que a conexão Modbus seja fechada ao sair do loop
         client.close()
+        if state_api is not None:
+            state_api.shutdown()
 
 if __name__ == "__main__":
     main()